@@ -3,7 +3,6 @@ import dataclasses
 import decimal
 import json
 import os
-import requests
 import typing
 
 class CryptoFilesException(Exception):
@@ -39,6 +38,7 @@ class CryptoFiles:
         self.rpcuser = rpcuser
         self.rpcpassword = rpcpassword
         self.__session = None
+        self.timeout = None
         self.chain_name, self.genesis_hash, self.genesis_txid = None, None, None
 
     def identifiers(self):
@@ -53,13 +53,15 @@ class CryptoFiles:
 
     def rpc(self, apiname, *params):
         if self.__session is None:
+            import requests
             self.__session = requests.Session()
             self.__idcount = 0
         self.__idcount += 1
         result = self.__session.post(
             self.rpcurl,
             auth=(self.rpcuser, self.rpcpassword),
-            json={'version': '1.1', 'method': apiname, 'params': params, 'id': self.__idcount}
+            json={'version': '1.1', 'method': apiname, 'params': params, 'id': self.__idcount},
+            timeout=self.timeout
         ).text
         result = json.loads(result, parse_float=decimal.Decimal)
         if result["error"] is not None:
@@ -195,10 +197,12 @@ class ChainData:
                 pass
 
 import os
-import sqlite3
 import threading
+import warnings
 class Database:
-    def __init__(self, path, *chains):
+    # stored chains are reconnected in the background, each rpc to a node given timeout seconds to respond.
+    # pass reconnect=False to open the index for queries without contacting any node.
+    def __init__(self, path, *chains, reconnect=True, timeout=10):
         os.makedirs(path, exist_ok=True)
         self.filename = os.path.join(path, 'cryptofiles.db')
         with self.connection() as db:
@@ -214,50 +218,73 @@ class Database:
             ''')
         self.chains = {}
         self.threads = {}
+        self._lock = threading.Lock()
         for chain in chains:
             self.connect_chain(chain)
+        if not reconnect:
+            return
         with self.connection() as db:
-            for id, name, genesis, params, version in db.execute('SELECT * FROM chains'):
-                if id in self.chains or params is None:
-                    continue
-                chain = CryptoFiles(*json.loads(params))
-                chainname, chaingenesis, chaintxid = chain.identifiers()
-                if name == chainname and genesis == chaingenesis:
-                    self.connect_chain(chain)
-                else:
-                    db.execute('REPLACE INTO `chains` (params) VALUES (NULL) WHERE id = ?', id)
+            stored = db.execute('SELECT rowid, name, genesis, params, version FROM chains').fetchall()
+        for dbid, name, genesis, params, version in stored:
+            if dbid in self.chains or params is None:
+                continue
+            thread = threading.Thread(target=self._reconnect(dbid, name, genesis, params, timeout), daemon=True)
+            self.threads[dbid] = thread
+            thread.start()
     def connection(self):
+        import sqlite3
         return sqlite3.connect(self.filename)
+    def _reconnect(self, dbid, name, genesis, params, timeout):
+        def reconnect():
+            try:
+                chain = CryptoFiles(*json.loads(params))
+                chain.timeout = timeout
+                chainname, chaingenesis, chaintxid = chain.identifiers()
+            except Exception as e:
+                # node unreachable or stored params unusable; leave them stored to try again next time
+                warnings.warn('could not reconnect to stored chain {}: {}'.format(name, e))
+                return
+            chain.timeout = None
+            if name == chainname and genesis == chaingenesis:
+                self.connect_chain(chain)
+            else:
+                with self.connection() as db:
+                    db.execute('UPDATE `chains` SET params = NULL WHERE rowid = ?', (dbid,))
+        return reconnect
     def connect_chain(self, chain):
         name, genesis_blockhash, genesis_txid = chain.identifiers()
-        with self.connection() as db:
-            result = db.execute(
-                'SELECT id, params, version FROM `chains` WHERE name = ? AND genesis = ?',
-                (name, genesis_blockhash)
-            ).fetchone()
-            if result is None:
-                cursor = db.cursor()
-                cursor.execute(
-                    'INSERT INTO `chains` (name, genesis, params, version) VALUES (?,?,?,?)',
-                    (name, genesis_blockhash, json.dumps(chain._localparams), chain.VERSION)
-                )
-                dbid = cursor.lastrowid
-                dbversion = chain.VERSION
-            else:
-                dbid, dbparams, dbversion = result
-                if dbparams != json.dumps(chain._localparams):
-                    db.execute(
-                        'UPDATE `chains` SET params = ? WHERE id = ?',
-                        (json.dumps(chain._localparams), dbid)
+        # held so a background reconnect and an explicit call cannot both index the same chain
+        with self._lock:
+            with self.connection() as db:
+                result = db.execute(
+                    'SELECT rowid, params, version FROM `chains` WHERE name = ? AND genesis = ?',
+                    (name, genesis_blockhash)
+                ).fetchone()
+                if result is None:
+                    cursor = db.cursor()
+                    cursor.execute(
+                        'INSERT INTO `chains` (name, genesis, params, version) VALUES (?,?,?,?)',
+                        (name, genesis_blockhash, json.dumps(chain._localparams), chain.VERSION)
                     )
-        self.chains[dbid] = {
-            'threads': {},
-            'chain': chain
-        }
-        for datatype in chain.DATATYPES:
-            thread = threading.Thread(target=self._run(dbid, datatype))
-            self.chains[dbid]['threads'][datatype] = thread
-            thread.start()
+                    dbid = cursor.lastrowid
+                    dbversion = chain.VERSION
+                else:
+                    dbid, dbparams, dbversion = result
+                    if dbid in self.chains:
+                        return
+                    if dbparams != json.dumps(chain._localparams):
+                        db.execute(
+                            'UPDATE `chains` SET params = ? WHERE rowid = ?',
+                            (json.dumps(chain._localparams), dbid)
+                        )
+            self.chains[dbid] = {
+                'threads': {},
+                'chain': chain
+            }
+            for datatype in chain.DATATYPES:
+                thread = threading.Thread(target=self._run(dbid, datatype))
+                self.chains[dbid]['threads'][datatype] = thread
+                thread.start()
     def _run(self, dbid, datatype):
         def run():
             chain = self.chains[dbid]['chain']
@@ -286,10 +313,7 @@ class Database:
         
 
 
-import bz2
 import hashlib
-import lzma
-import warnings
 
 @dataclasses.dataclass
 class BZ2:
@@ -301,9 +325,9 @@ class BZ2:
         data = self.data
     @property
     def data(self):
+        import bz2
         return bz2.decompress(self.chaindata.data)
 
-from . import envelope_pb2
 @dataclasses.dataclass
 class DatacoinEnvelope:
     data : bytes
@@ -314,6 +338,7 @@ class DatacoinEnvelope:
         envelope = self._envelope
     @property
     def _envelope(self):
+        from . import envelope_pb2
         envelope = envelope_pb2.Envelope()
         with warnings.catch_warnings():
             warnings.simplefilter('ignore')
@@ -329,8 +354,10 @@ class DatacoinEnvelope:
     def data(self):
         envelope = self._envelope
         if envelope.Compression == envelope.CompressionMethod.Bzip2:
+            import bz2
             return bz2.decompress(envelope.Data)
         elif envelope.Compression == envelope.CompressionMethod.Xz:
+            import lzma
             return lzma.decompress(envelope.Data)
         else:
             return envelope.Data
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 
+import re
 import setuptools
-import cryptofiles
+
+with open('cryptofiles/__init__.py', 'r', encoding='utf-8') as fh:
+    version = re.search(r"^__version__ = '([^']*)'", fh.read(), re.M).group(1)
 
 with open('README.md', 'r', encoding='utf-8') as fh:
     long_description = fh.read()
@@ -10,7 +13,7 @@ with open('LICENSE', 'r', encoding='utf-8') as fh:
 
 setuptools.setup(
     name='cryptofiles',
-    version=cryptofiles.__version__,
+    version=version,
     author='xloem',
     author_email='0xloem@gmail.com',
     description='for working with blockchained files',
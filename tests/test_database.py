@@ -0,0 +1,100 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+import cryptofiles
+
+def store_chain(path, name, genesis, params):
+    db = cryptofiles.Database(path, reconnect=False)
+    with db.connection() as conn:
+        conn.execute(
+            'INSERT INTO `chains` (name, genesis, params, version) VALUES (?,?,?,?)',
+            (name, genesis, params, cryptofiles.CryptoFiles.VERSION)
+        )
+
+def stored_params(db):
+    with db.connection() as conn:
+        return [params for params, in conn.execute('SELECT params FROM `chains` ORDER BY rowid')]
+
+def join(db):
+    for thread in db.threads.values():
+        thread.join()
+
+def unreachable_params(tmp_path):
+    return json.dumps([str(tmp_path), '127.0.0.1:1', None, None, None])
+
+def test_lazy_imports():
+    modules = ('requests', 'sqlite3', 'bz2', 'lzma', 'cryptofiles.envelope_pb2')
+    loaded = subprocess.check_output([
+        sys.executable, '-c',
+        'import sys, cryptofiles; print(" ".join(m for m in {!r} if m in sys.modules))'.format(modules)
+    ], text=True).split()
+    assert loaded == []
+
+def test_no_reconnect(tmp_path):
+    store_chain(tmp_path, 'datacoin', 'genesis', unreachable_params(tmp_path))
+    db = cryptofiles.Database(tmp_path, reconnect=False)
+    assert db.threads == {}
+    assert db.chains == {}
+
+def test_reconnect_unreachable(tmp_path):
+    params = unreachable_params(tmp_path)
+    store_chain(tmp_path, 'datacoin', 'genesis', params)
+    store_chain(tmp_path, 'bitcoinsv', 'genesis', params)
+    with pytest.warns(UserWarning, match='could not reconnect'):
+        db = cryptofiles.Database(tmp_path, timeout=1)
+        assert len(db.threads) == 2
+        join(db)
+    assert db.chains == {}
+    assert stored_params(db) == [params, params]
+
+def test_reconnect_malformed(tmp_path):
+    store_chain(tmp_path, 'datacoin', 'genesis', 'not json')
+    with pytest.warns(UserWarning, match='could not reconnect'):
+        db = cryptofiles.Database(tmp_path)
+        join(db)
+    assert stored_params(db) == ['not json']
+
+def test_reconnect_mismatch(tmp_path, monkeypatch):
+    monkeypatch.setattr(cryptofiles.CryptoFiles, 'identifiers', lambda self: ('datacoin', 'othergenesis', 'txid'))
+    store_chain(tmp_path, 'datacoin', 'genesis', unreachable_params(tmp_path))
+    db = cryptofiles.Database(tmp_path)
+    join(db)
+    assert db.chains == {}
+    assert stored_params(db) == [None]
+
+def test_reconnect_skips_connected(tmp_path, monkeypatch):
+    monkeypatch.setattr(cryptofiles.CryptoFiles, 'identifiers', lambda self: ('datacoin', 'genesis', 'txid'))
+    chain = cryptofiles.Datacoin(str(tmp_path), '127.0.0.1:1')
+    chain.DATATYPES = []
+    cryptofiles.Database(tmp_path, chain, reconnect=False)
+    chain = cryptofiles.Datacoin(str(tmp_path), '127.0.0.1:1')
+    chain.DATATYPES = []
+    db = cryptofiles.Database(tmp_path, chain)
+    assert db.threads == {}
+    assert list(db.chains.values())[0]['chain'] is chain
+
+def test_reconnect_match(tmp_path, monkeypatch):
+    monkeypatch.setattr(cryptofiles.CryptoFiles, 'identifiers', lambda self: ('datacoin', 'genesis', 'txid'))
+    monkeypatch.setattr(cryptofiles.CryptoFiles, 'DATATYPES', [])
+    params = unreachable_params(tmp_path)
+    store_chain(tmp_path, 'datacoin', 'genesis', params)
+    db = cryptofiles.Database(tmp_path)
+    join(db)
+    assert list(db.chains) == [1]
+    assert db.chains[1]['chain'].timeout is None
+    assert stored_params(db) == [params]
+
+def test_connect_during_reconnect(tmp_path, monkeypatch):
+    monkeypatch.setattr(cryptofiles.CryptoFiles, 'identifiers', lambda self: ('datacoin', 'genesis', 'txid'))
+    runs = []
+    monkeypatch.setattr(cryptofiles.Database, '_run', lambda self, dbid, datatype: lambda: runs.append((dbid, datatype)))
+    store_chain(tmp_path, 'datacoin', 'genesis', unreachable_params(tmp_path))
+    db = cryptofiles.Database(tmp_path)
+    db.connect_chain(cryptofiles.Datacoin(str(tmp_path), '127.0.0.1:1'))
+    join(db)
+    for thread in db.chains[1]['threads'].values():
+        thread.join()
+    assert runs == [(1, datatype) for datatype in cryptofiles.CryptoFiles.DATATYPES]